@@ -0,0 +1,69 @@
+"""
+Throughput benchmark for the bulk venue import/export endpoints
+Run from the repo root: python benchmarks/bulk_venues.py [rows]
+Uses a temporary catalog and outbox, so data/venues.json is never touched
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+TMP_DIR = tempfile.mkdtemp(prefix="venues-bench-")
+os.environ["OUTBOX_DB_PATH"] = os.path.join(TMP_DIR, "outbox.db")
+# main.py builds the OpenAI client at import time; the benchmark never calls it
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+
+from fastapi.testclient import TestClient
+import main
+
+def ndjson_body(rows: int) -> str:
+    return "\n".join(
+        json.dumps({
+            "name": f"Bench Court {i}",
+            "city": "Amman",
+            "district": "Khalda",
+            "type": "Padel",
+            "priceJOD": 10 + i % 30,
+            "isIndoor": i % 2 == 0
+        })
+        for i in range(rows)
+    )
+
+def csv_body(rows: int) -> str:
+    header = ",".join(main.VENUE_FIELDS)
+    lines = [f'"Bench Field, {i}",Amman,Sweifieh,Soccer,12.5,True,,' for i in range(rows)]
+    return "\n".join([header] + lines)
+
+def timed(label: str, rows: int, fn):
+    start = time.perf_counter()
+    response = fn()
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise SystemExit(f"{label} failed: {response.status_code} {response.text[:200]}")
+    print(f"{label:<14} {rows:>7} rows  {elapsed:7.3f}s  {rows / elapsed:>9.0f} rows/s")
+    return response
+
+def main_benchmark(rows: int):
+    main.VENUES_PATH = os.path.join(TMP_DIR, "venues.json")
+    main.VENUES_DATA = {"venues": []}
+    client = TestClient(main.app)
+
+    timed("NDJSON import", rows, lambda: client.post("/admin/venues/import?format=ndjson", content=ndjson_body(rows)))
+    timed("CSV import", rows, lambda: client.post("/admin/venues/import?format=csv", content=csv_body(rows)))
+
+    total = len(main.VENUES_DATA["venues"])
+    timed("NDJSON export", total, lambda: client.get("/admin/venues/export?format=ndjson"))
+    timed("CSV export", total, lambda: client.get("/admin/venues/export?format=csv"))
+
+if __name__ == "__main__":
+    try:
+        main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
+    finally:
+        main.OUTBOX.conn.close()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
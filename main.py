@@ -4,14 +4,25 @@ A lightweight FastAPI server for the Amman sports booking demo
 """
 
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
+from collections import Counter, OrderedDict
+import asyncio
+import csv
+import io
+import ipaddress
 import json
+import math
 import random
+import sqlite3
+import tempfile
+import threading
+import time
 from datetime import datetime, timedelta
 import os
 import openai
@@ -31,9 +42,11 @@ app = FastAPI(
 SYSTEM_TIME_OVERRIDE = None # Setting this will override the auto-detected time
 
 # CORS middleware for frontend integration
+# Comma-separated list in CORS_ALLOW_ORIGINS restricts callers; defaults to any origin for the demo
+CORS_ALLOW_ORIGINS = [o.strip() for o in os.environ.get("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ALLOW_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -102,6 +115,7 @@ class BookingRequest(BaseModel):
     time: str
     userName: str
     phone: str
+    sessionId: Optional[str] = None
 
 class BookingResponse(BaseModel):
     success: bool
@@ -400,7 +414,7 @@ def get_availability_tool(venue_name: str, date: str = None):
     except HTTPException as e:
         return {"error": e.detail}
 
-def create_booking_tool(venue: str, date: str, time: str, user_name: str, phone: str):
+def create_booking_tool(venue: str, date: str, time: str, user_name: str, phone: str, session_id: str = None):
     """
     Create a sports booking reservation.
     """
@@ -409,7 +423,8 @@ def create_booking_tool(venue: str, date: str, time: str, user_name: str, phone:
         date=date,
         time=time,
         userName=user_name,
-        phone=phone
+        phone=phone,
+        sessionId=session_id
     )
     return create_booking(booking_req)
 
@@ -473,17 +488,206 @@ TOOLS = [
 CHAT_HISTORY = {}
 MAX_HISTORY = 20
 
+# ============================================
+# ADMISSION CONTROL (Rate Limits + LLM Concurrency)
+# ============================================
+
+# Tunable at runtime through POST /admin/settings. A rate of 0 disables that limit.
+ADMISSION_SETTINGS = {
+    "rate_limit_ip_per_minute": float(os.environ.get("RATE_LIMIT_IP_PER_MINUTE", "30")),
+    "rate_limit_ip_burst": float(os.environ.get("RATE_LIMIT_IP_BURST", "10")),
+    "rate_limit_session_per_minute": float(os.environ.get("RATE_LIMIT_SESSION_PER_MINUTE", "12")),
+    "rate_limit_session_burst": float(os.environ.get("RATE_LIMIT_SESSION_BURST", "5")),
+    "llm_max_concurrent": int(os.environ.get("LLM_MAX_CONCURRENT", "4")),
+    "llm_max_queue": int(os.environ.get("LLM_MAX_QUEUE", "8")),
+    "llm_queue_timeout_seconds": float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "10")),
+}
+
+ADMISSION_METRICS = {
+    "admitted": 0,
+    "rejected_ip_rate_limit": 0,
+    "rejected_session_rate_limit": 0,
+    "shed_queue_full": 0,
+    "shed_queue_timeout": 0,
+}
+ADMISSION_METRICS_LOCK = threading.Lock()
+
+def count_admission(metric: str):
+    """Bump an admission counter; called concurrently from threadpool workers"""
+    with ADMISSION_METRICS_LOCK:
+        ADMISSION_METRICS[metric] += 1
+
+class TokenBucketLimiter:
+    """Token-bucket rate limiter keyed by client (IP or session). Limits are read from ADMISSION_SETTINGS on every call."""
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self, rate_setting: str, burst_setting: str):
+        self.rate_setting = rate_setting
+        self.burst_setting = burst_setting
+        self.buckets = OrderedDict()  # key -> (tokens, last_refill), least recently seen first
+        self.lock = threading.Lock()
+
+    def allow(self, key: str) -> bool:
+        rate = ADMISSION_SETTINGS[self.rate_setting] / 60.0
+        capacity = max(ADMISSION_SETTINGS[self.burst_setting], 1.0)
+        if rate <= 0:
+            return True
+
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= 1.0
+            self.buckets[key] = (tokens - 1.0 if allowed else tokens, now)
+            # LRU eviction keeps memory bounded with constant work per request
+            while len(self.buckets) > self.MAX_BUCKETS:
+                self.buckets.popitem(last=False)
+            return allowed
+
+class LLMAdmissionGate:
+    """Caps in-flight LLM calls; extra requests wait in a bounded queue or get shed"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.waiting = 0
+        self.cond = threading.Condition()
+
+    def acquire(self) -> bool:
+        with self.cond:
+            if self.in_flight < ADMISSION_SETTINGS["llm_max_concurrent"]:
+                self.in_flight += 1
+                return True
+            if self.waiting >= ADMISSION_SETTINGS["llm_max_queue"]:
+                count_admission("shed_queue_full")
+                return False
+
+            self.waiting += 1
+            try:
+                admitted = self.cond.wait_for(
+                    lambda: self.in_flight < ADMISSION_SETTINGS["llm_max_concurrent"],
+                    timeout=ADMISSION_SETTINGS["llm_queue_timeout_seconds"]
+                )
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                count_admission("shed_queue_timeout")
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+
+    def resize(self):
+        """Wake waiters after llm_max_concurrent changes"""
+        with self.cond:
+            self.cond.notify_all()
+
+# Reverse proxies allowed to set X-Forwarded-For (comma-separated IPs or CIDRs, e.g. "10.0.0.0/8").
+# Empty means the header is ignored and the socket peer address is used.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(p.strip(), strict=False)
+    for p in os.environ.get("TRUSTED_PROXIES", "").split(",") if p.strip()
+]
+# Number of trusted proxies in front of the app; each one appends a hop to X-Forwarded-For
+TRUSTED_PROXY_HOPS = max(int(os.environ.get("TRUSTED_PROXY_HOPS", "1")), 1)
+
+IP_RATE_LIMITER = TokenBucketLimiter("rate_limit_ip_per_minute", "rate_limit_ip_burst")
+SESSION_RATE_LIMITER = TokenBucketLimiter("rate_limit_session_per_minute", "rate_limit_session_burst")
+LLM_GATE = LLMAdmissionGate()
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+def get_client_ip(http_request: Request) -> str:
+    """
+    Client IP for rate limiting. X-Forwarded-For is only honoured when the
+    connection comes from a trusted proxy; each of the TRUSTED_PROXY_HOPS proxies
+    appends one hop, so the client is that many entries from the end.
+    Anything further left was sent by the client and can't be trusted.
+    """
+    peer = http_request.client.host if http_request.client else "unknown"
+    forwarded = http_request.headers.get("x-forwarded-for")
+    if not forwarded or not is_trusted_proxy(peer):
+        return peer
+
+    hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+    if not hops:
+        return peer
+    return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+
+def validate_admission_settings(settings: dict) -> dict:
+    """Parse the admission-control keys of an admin settings payload without applying anything"""
+    validated = {}
+    for key, current in ADMISSION_SETTINGS.items():
+        if key not in settings:
+            continue
+        raw = settings[key]
+        is_int_setting = isinstance(current, int)
+        try:
+            # bool is an int subclass - never let true/false through as 1/0
+            if isinstance(raw, bool):
+                raise ValueError
+            if is_int_setting and isinstance(raw, float) and not raw.is_integer():
+                raise ValueError
+            value = int(raw) if is_int_setting else float(raw)
+        except (TypeError, ValueError, OverflowError):
+            kind = "an integer" if is_int_setting else "a number"
+            raise HTTPException(status_code=400, detail=f"{key} must be {kind}")
+        if not math.isfinite(value):
+            raise HTTPException(status_code=400, detail=f"{key} must be a finite number")
+        if value < 0:
+            raise HTTPException(status_code=400, detail=f"{key} must be >= 0")
+        validated[key] = value
+    return validated
+
+def update_admission_settings(updated: dict):
+    """Apply admission-control settings already checked by validate_admission_settings"""
+    ADMISSION_SETTINGS.update(updated)
+    if updated:
+        LLM_GATE.resize()
+        print(f"⚙️ Admin: Admission settings updated {updated}")
+
 @app.post("/chat", response_model=ChatResponse)
-def chat_with_ai(request: ChatRequest):
+def chat_with_ai(request: ChatRequest, http_request: Request):
     """
     AI chat endpoint using OpenAI Agent with function calling and memory.
+    Rate limited per IP and per session; sheds to the static fallback when the LLM is saturated.
     """
+    session_id = request.sessionId or "default"
+
+    if not IP_RATE_LIMITER.allow(get_client_ip(http_request)):
+        count_admission("rejected_ip_rate_limit")
+        raise HTTPException(status_code=429, detail="Too many requests, please slow down", headers={"Retry-After": "10"})
+    if not SESSION_RATE_LIMITER.allow(session_id):
+        count_admission("rejected_session_rate_limit")
+        raise HTTPException(status_code=429, detail="Too many messages in this chat, please slow down", headers={"Retry-After": "10"})
+
+    DASHBOARD_METRICS.record_chat(session_id)
+
     if not os.environ.get("OPENAI_API_KEY"):
         # Fallback to static logic if no API key
         return static_chat_fallback(request)
 
-    session_id = request.sessionId or "default"
-    
+    if not LLM_GATE.acquire():
+        # Load shedding: answer from the static logic rather than queueing indefinitely
+        return static_chat_fallback(request)
+
+    count_admission("admitted")
+    try:
+        return run_agent_chat(request, session_id)
+    finally:
+        LLM_GATE.release()
+
+def run_agent_chat(request: ChatRequest, session_id: str):
+    """Run the OpenAI agent turn (two model calls when tools are used)"""
     # Initialize or retrieve history
     if session_id not in CHAT_HISTORY:
         CHAT_HISTORY[session_id] = [
@@ -551,7 +755,7 @@ def chat_with_ai(request: ChatRequest):
                             "price": venue_data["priceJOD"] if venue_data else 25
                         }
                 elif function_name == "create_booking":
-                    function_response = create_booking_tool(**function_args)
+                    function_response = create_booking_tool(**function_args, session_id=session_id)
                     if function_response.get("success"):
                         booking_confirmed = True
                 
@@ -613,35 +817,303 @@ def static_chat_fallback(request: ChatRequest):
         "filterApplied": request.message
     }
 
+# ============================================
+# BOOKING SIDE-EFFECTS (DURABLE OUTBOX)
+# ============================================
+
+class ConsoleMessagingSink:
+    """Default messaging sink - prints outgoing WhatsApp messages to the console"""
+
+    def send(self, phone: str, message: str):
+        print(f"📱 WhatsApp -> {phone}: {message}")
+
+class FakeMessagingSink:
+    """In-memory messaging sink for local testing - records every message sent"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, phone: str, message: str):
+        self.sent.append({"phone": phone, "message": message})
+
+class SideEffectQueue:
+    """
+    In-process background job queue backed by a SQLite outbox.
+    Jobs are written in the same transaction as the data that caused them,
+    then picked up by a pool of worker threads with retries and exponential backoff.
+    Jobs left 'processing' by a crash are re-queued on start.
+    """
+
+    def __init__(self, db_path: str, workers: int = 2, max_attempts: int = 5,
+                 base_backoff: float = 1.0, poll_interval: float = 1.0):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.poll_interval = poll_interval
+        self.handlers = {}
+        self.last_lag_seconds = None
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS bookings (
+                    booking_id TEXT PRIMARY KEY,
+                    venue TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    user_name TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_ready ON outbox (status, next_attempt_at);
+                CREATE TABLE IF NOT EXISTS audit_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event TEXT NOT NULL,
+                    details TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+            """)
+
+    def register(self, job_type: str, handler):
+        """Register the function that processes jobs of the given type"""
+        self.handlers[job_type] = handler
+
+    def transaction(self):
+        """Context manager yielding a connection inside a write transaction"""
+        queue = self
+
+        class _Transaction:
+            def __enter__(self):
+                queue._lock.acquire()
+                queue.conn.execute("BEGIN IMMEDIATE")
+                return queue.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                try:
+                    queue.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                finally:
+                    queue._lock.release()
+                if not exc_type:
+                    queue.notify()
+                return False
+
+        return _Transaction()
+
+    def enqueue(self, conn, job_type: str, payload: dict):
+        """Add a job to the outbox - call inside transaction() so it commits with the caller's writes"""
+        now = time.time()
+        conn.execute(
+            "INSERT INTO outbox (job_type, payload, created_at, next_attempt_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_type, json.dumps(payload), now, now, now)
+        )
+
+    def notify(self):
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def start(self):
+        """Recover interrupted jobs and spin up the worker pool"""
+        if self._threads:
+            return
+        with self._lock:
+            self.conn.execute("UPDATE outbox SET status = 'pending' WHERE status = 'processing'")
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"outbox-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self.notify()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _claim(self):
+        with self._lock:
+            now = time.time()
+            row = self.conn.execute(
+                "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE outbox SET status = 'processing', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row["id"])
+                )
+            return row
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        attempts = job["attempts"] + 1
+        try:
+            handler = self.handlers[job["job_type"]]
+            handler(json.loads(job["payload"]))
+        except Exception as e:
+            now = time.time()
+            if attempts >= self.max_attempts:
+                status, next_attempt = "dead", now
+                print(f"❌ Outbox: job {job['id']} ({job['job_type']}) failed permanently: {e}")
+            else:
+                status, next_attempt = "pending", now + self.base_backoff * (2 ** (attempts - 1))
+            with self._lock:
+                self.conn.execute(
+                    "UPDATE outbox SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    (status, str(e), next_attempt, now, job["id"])
+                )
+            return
+
+        now = time.time()
+        self.last_lag_seconds = round(now - job["created_at"], 3)
+        with self._lock:
+            self.conn.execute(
+                "UPDATE outbox SET status = 'done', last_error = NULL, updated_at = ? WHERE id = ?",
+                (now, job["id"])
+            )
+
+    def stats(self) -> dict:
+        """Queue depth, lag and per-status counts for the admin dashboard"""
+        with self._lock:
+            counts = {
+                row["status"]: row["n"]
+                for row in self.conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status")
+            }
+            oldest = self.conn.execute(
+                "SELECT MIN(created_at) AS t FROM outbox WHERE status IN ('pending', 'processing')"
+            ).fetchone()["t"]
+        return {
+            "depth": counts.get("pending", 0) + counts.get("processing", 0),
+            "oldest_pending_age_seconds": round(time.time() - oldest, 3) if oldest else 0,
+            "last_lag_seconds": self.last_lag_seconds,
+            "workers": len(self._threads),
+            "counts": counts
+        }
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Block until no job is pending or processing (handy in tests)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.stats()["depth"] == 0:
+                return True
+            time.sleep(0.05)
+        return False
+
+OUTBOX_DB_PATH = os.environ.get("OUTBOX_DB_PATH", os.path.join(BASE_DIR, "data", "outbox.db"))
+MESSAGING_SINK = FakeMessagingSink() if os.environ.get("MESSAGING_SINK") == "fake" else ConsoleMessagingSink()
+OUTBOX = SideEffectQueue(
+    OUTBOX_DB_PATH,
+    workers=int(os.environ.get("OUTBOX_WORKERS", "2")),
+    max_attempts=int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "5"))
+)
+
+def send_booking_confirmation(payload: dict):
+    """Log the confirmed booking (replaces the inline console print)"""
+    print("\n" + "="*50)
+    print("🎾 NEW BOOKING RECEIVED")
+    print("="*50)
+    print(f"Booking ID: {payload['bookingId']}")
+    print(f"Venue: {payload['venue']}")
+    print(f"Date: {payload['date']}")
+    print(f"Time: {payload['time']}")
+    print(f"Customer: {payload['userName']}")
+    print(f"Phone: {payload['phone']}")
+    print("="*50 + "\n")
+
+def send_whatsapp_message(payload: dict):
+    """Deliver the WhatsApp confirmation through the configured messaging sink"""
+    MESSAGING_SINK.send(payload["phone"], payload["message"])
+
+def write_audit_record(payload: dict):
+    """Append an entry to the audit log"""
+    with OUTBOX.transaction() as conn:
+        conn.execute(
+            "INSERT INTO audit_log (event, details, created_at) VALUES (?, ?, ?)",
+            (payload["event"], json.dumps(payload["details"]), time.time())
+        )
+
+OUTBOX.register("booking_confirmation", send_booking_confirmation)
+OUTBOX.register("whatsapp_message", send_whatsapp_message)
+OUTBOX.register("audit_record", write_audit_record)
+
+@app.on_event("startup")
+def start_outbox_workers():
+    OUTBOX.start()
+
+@app.on_event("shutdown")
+def stop_outbox_workers():
+    OUTBOX.stop()
+
 @app.post("/booking", response_model=BookingResponse)
 def create_booking(booking: BookingRequest):
     """
-    Simulate booking action - logs to console and returns success
-    In production, this would save to database
+    Commit the reservation and enqueue its side effects (confirmation log,
+    WhatsApp message, audit record) to the outbox - returns without waiting for them
     """
     # Validate venue exists
+    venue = None
     if VENUES_DATA and "venues" in VENUES_DATA:
-        venue_exists = any(
-            v["name"].lower() == booking.venue.lower() 
-            for v in VENUES_DATA["venues"]
+        venue = next(
+            (v for v in VENUES_DATA["venues"] if v["name"].lower() == booking.venue.lower()),
+            None
         )
-        if not venue_exists:
+        if not venue:
             raise HTTPException(status_code=404, detail="Venue not found")
     
-    # Generate random booking ID
-    booking_id = f"BK{random.randint(10000, 99999)}"
-    
-    # Console log for demo
-    print("\n" + "="*50)
-    print("🎾 NEW BOOKING RECEIVED")
-    print("="*50)
-    print(f"Booking ID: {booking_id}")
-    print(f"Venue: {booking.venue}")
-    print(f"Date: {booking.date}")
-    print(f"Time: {booking.time}")
-    print(f"Customer: {booking.userName}")
-    print(f"Phone: {booking.phone}")
-    print("="*50 + "\n")
+    # Generate random booking ID (retry on the rare collision)
+    for _ in range(5):
+        booking_id = f"BK{random.randint(10000, 99999)}"
+        payload = {"bookingId": booking_id, **booking.dict()}
+        try:
+            with OUTBOX.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO bookings (booking_id, venue, date, time, user_name, phone, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (booking_id, booking.venue, booking.date, booking.time, booking.userName, booking.phone, time.time())
+                )
+                OUTBOX.enqueue(conn, "booking_confirmation", payload)
+                OUTBOX.enqueue(conn, "whatsapp_message", {
+                    "phone": booking.phone,
+                    "message": f"Hi {booking.userName}, your booking {booking_id} at {booking.venue} on {booking.date} at {booking.time} is confirmed."
+                })
+                OUTBOX.enqueue(conn, "audit_record", {"event": "booking_created", "details": payload})
+            break
+        except sqlite3.IntegrityError:
+            continue
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate a booking ID, please retry")
+
+    DASHBOARD_METRICS.record_booking(
+        venue["name"] if venue else booking.venue,
+        venue.get("priceJOD", 0) if venue else 0,
+        booking.time,
+        booking.phone,
+        booking.sessionId
+    )
     
     return {
         "success": True,
@@ -662,59 +1134,492 @@ def whatsapp_connect():
         "connected": True
     }
 
+# ============================================
+# DASHBOARD METRICS (Incremental, Rolling Windows)
+# ============================================
+
+class RollingWindow:
+    """
+    Ring of fixed-size time buckets, each holding a Counter.
+    Totals are updated on every add and as old buckets expire,
+    so reading them never scans history.
+    """
+
+    def __init__(self, bucket_seconds: int, num_buckets: int, on_change=None):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self.on_change = on_change  # callback(key, old_total, new_total)
+        self.buckets = [Counter() for _ in range(num_buckets)]
+        self.current = None  # id of the newest bucket
+        self.totals = Counter()
+
+    def advance(self, now: float):
+        """Expire buckets that have slid out of the window"""
+        bucket_id = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = bucket_id
+            return
+        # At most one lap of the ring, however long we've been idle
+        for expired_id in range(max(self.current + 1, bucket_id - self.num_buckets + 1), bucket_id + 1):
+            bucket = self.buckets[expired_id % self.num_buckets]
+            for key, amount in bucket.items():
+                self._apply(key, -amount)
+            bucket.clear()
+        self.current = max(self.current, bucket_id)
+
+    def add(self, key, amount: float = 1, now: float = None):
+        self.advance(time.time() if now is None else now)
+        self.buckets[self.current % self.num_buckets][key] += amount
+        self._apply(key, amount)
+
+    def _apply(self, key, delta: float):
+        old = self.totals[key]
+        new = old + delta
+        if abs(new) < 1e-9:
+            new = 0
+            self.totals.pop(key, None)
+        else:
+            self.totals[key] = new
+        if self.on_change:
+            self.on_change(key, old, new)
+
+class DashboardMetrics:
+    """
+    Admin dashboard aggregates fed by booking and chat events.
+    Everything is kept over a rolling 30-day window (daily buckets);
+    active inquiries use the last hour (minute buckets).
+    """
+
+    WINDOW_DAYS = 30
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        day = 24 * 60 * 60
+        self.totals = RollingWindow(day, self.WINDOW_DAYS)  # "revenue", "bookings"
+        self.venues = RollingWindow(day, self.WINDOW_DAYS, self._on_venue_change)
+        self.hours = RollingWindow(day, self.WINDOW_DAYS)
+        self.phones = RollingWindow(day, self.WINDOW_DAYS, self._on_phone_change)
+        self.chat_sessions = RollingWindow(day, self.WINDOW_DAYS, self._on_chat_session_change)
+        self.booked_sessions = RollingWindow(day, self.WINDOW_DAYS, self._on_booked_session_change)
+        self.active_sessions = RollingWindow(60, 60)
+        self.windows = [self.totals, self.venues, self.hours, self.phones,
+                        self.chat_sessions, self.booked_sessions, self.active_sessions]
+
+        self.returning_users = 0
+        self.converted_sessions = 0
+        self.top_venue = None
+        self.top_venue_stale = False
+        self.subscribers = {}  # asyncio.Event -> event loop
+
+    # --- incremental bookkeeping (called with self.lock held) ---
+
+    def _on_venue_change(self, key, old, new):
+        if new < old:
+            if key == self.top_venue:
+                self.top_venue_stale = True
+        elif not self.top_venue_stale and (self.top_venue is None or new > self.venues.totals[self.top_venue]):
+            self.top_venue = key
+
+    def _on_phone_change(self, key, old, new):
+        if old < 2 <= new:
+            self.returning_users += 1
+        elif new < 2 <= old:
+            self.returning_users -= 1
+
+    def _on_chat_session_change(self, key, old, new):
+        if self.booked_sessions.totals[key]:
+            self.converted_sessions += (old == 0 < new) - (new == 0 < old)
+
+    def _on_booked_session_change(self, key, old, new):
+        if self.chat_sessions.totals[key]:
+            self.converted_sessions += (old == 0 < new) - (new == 0 < old)
+
+    # --- event feed ---
+
+    def record_booking(self, venue: str, price: float, slot_time: str, phone: str,
+                       session_id: Optional[str] = None, now: float = None):
+        now = time.time() if now is None else now
+        try:
+            hour = int(slot_time.split(":")[0]) % 24
+        except (ValueError, AttributeError):
+            hour = datetime.fromtimestamp(now).hour
+
+        with self.lock:
+            self.totals.add("revenue", price, now)
+            self.totals.add("bookings", 1, now)
+            self.venues.add(venue, 1, now)
+            self.hours.add(hour, 1, now)
+            self.phones.add(phone, 1, now)
+            if session_id:
+                self.booked_sessions.add(session_id, 1, now)
+        self.publish()
+
+    def record_chat(self, session_id: str, now: float = None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.chat_sessions.add(session_id, 1, now)
+            self.active_sessions.add(session_id, 1, now)
+        self.publish()
+
+    def snapshot(self, now: float = None) -> dict:
+        """Current dashboard figures - O(1) apart from the 24-slot peak-hour lookup"""
+        now = time.time() if now is None else now
+        with self.lock:
+            for window in self.windows:
+                window.advance(now)
+            if self.top_venue_stale:
+                totals = self.venues.totals
+                self.top_venue = max(totals, key=totals.get) if totals else None
+                self.top_venue_stale = False
+
+            revenue = self.totals.totals["revenue"]
+            bookings = int(self.totals.totals["bookings"])
+            hours = self.hours.totals
+            peak_hour = max(hours, key=hours.get) if hours else None
+            chat_sessions = len(self.chat_sessions.totals)
+            users = len(self.phones.totals)
+
+            return {
+                "monthly_revenue_jod": round(revenue, 2),
+                "total_bookings_this_month": bookings,
+                "average_booking_value_jod": round(revenue / bookings, 1) if bookings else 0,
+                "active_inquiries": len(self.active_sessions.totals),
+                "conversion_rate_percent": round(100 * self.converted_sessions / chat_sessions) if chat_sessions else 0,
+                "top_venue_this_month": self.top_venue or "—",
+                "peak_booking_time": format_hour_range(peak_hour) if peak_hour is not None else "—",
+                "returning_users_percent": round(100 * self.returning_users / users) if users else 0,
+            }
+
+    # --- Server-Sent Events fan-out ---
+
+    def subscribe(self) -> asyncio.Event:
+        event = asyncio.Event()
+        self.subscribers[event] = asyncio.get_running_loop()
+        return event
+
+    def unsubscribe(self, event: asyncio.Event):
+        self.subscribers.pop(event, None)
+
+    def publish(self):
+        """Wake every SSE stream; safe to call from worker threads"""
+        for event, loop in list(self.subscribers.items()):
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(event)
+
+def format_hour_range(hour: int) -> str:
+    """18 -> '6:00 PM – 7:00 PM'"""
+    def fmt(h):
+        h %= 24
+        return f"{h % 12 or 12}:00 {'AM' if h < 12 else 'PM'}"
+    return f"{fmt(hour)} – {fmt(hour + 1)}"
+
+DASHBOARD_METRICS = DashboardMetrics()
+METRICS_KEEPALIVE_SECONDS = 15
+
 @app.get("/admin/metrics")
 def get_admin_metrics():
     """Get admin dashboard metrics"""
     return {
-        "monthly_revenue_jod": 4500,
-        "total_bookings_this_month": 186,
-        "average_booking_value_jod": 24.2,
-        "active_inquiries": 12,
-        "conversion_rate_percent": 38,
-        "top_venue_this_month": "Trax Padel",
-        "peak_booking_time": "8:00 PM – 10:00 PM",
-        "returning_users_percent": 42,
+        **DASHBOARD_METRICS.snapshot(),
         "system_time_override": SYSTEM_TIME_OVERRIDE
     }
 
+@app.get("/admin/metrics/stream")
+async def stream_admin_metrics(request: Request):
+    """Server-Sent Events feed that pushes fresh metrics whenever a booking or chat happens"""
+
+    async def event_stream():
+        event = DASHBOARD_METRICS.subscribe()
+        try:
+            while True:
+                yield f"data: {json.dumps(get_admin_metrics())}\n\n"
+                while True:
+                    try:
+                        await asyncio.wait_for(event.wait(), timeout=METRICS_KEEPALIVE_SECONDS)
+                        break
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        yield ": keepalive\n\n"
+                event.clear()
+        finally:
+            DASHBOARD_METRICS.unsubscribe(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/admin/admission")
+def get_admission_stats():
+    """Current admission-control settings, in-flight LLM calls and rejection counters"""
+    with ADMISSION_METRICS_LOCK:
+        metrics = dict(ADMISSION_METRICS)
+    return {
+        "settings": ADMISSION_SETTINGS,
+        "llm_in_flight": LLM_GATE.in_flight,
+        "llm_waiting": LLM_GATE.waiting,
+        "metrics": metrics
+    }
+
+@app.get("/admin/queue")
+def get_queue_stats():
+    """Background side-effect queue depth and lag"""
+    return OUTBOX.stats()
+
+# Guards every read-modify-save-swap of VENUES_DATA (sync handlers and bulk import run concurrently)
+VENUES_LOCK = threading.Lock()
+
+def save_venues_data(data: dict) -> bool:
+    """Persist the venue catalog atomically (write to a temp file, then rename). Returns False on failure."""
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(VENUES_PATH), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, VENUES_PATH)
+        return True
+    except Exception as e:
+        print(f"Error saving venues: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
 @app.post("/admin/venues")
 def add_venue(venue: Venue):
     """Add a new venue to the database"""
     global VENUES_DATA
     
-    # Check if venue already exists
-    if any(v["name"].lower() == venue.name.lower() for v in VENUES_DATA["venues"]):
-        raise HTTPException(status_code=400, detail="Venue with this name already exists")
-    
-    # Add to list
-    VENUES_DATA["venues"].append(venue.dict())
-    
-    # Save to file
-    try:
-        with open(VENUES_PATH, "w", encoding="utf-8") as f:
-            json.dump(VENUES_DATA, f, indent=4)
-    except Exception as e:
-        print(f"Error saving venues: {e}")
+    with VENUES_LOCK:
+        # Check if venue already exists
+        if any(v["name"].lower() == venue.name.lower() for v in VENUES_DATA["venues"]):
+            raise HTTPException(status_code=400, detail="Venue with this name already exists")
+        
+        # Add to list
+        VENUES_DATA = {**VENUES_DATA, "venues": VENUES_DATA["venues"] + [venue.dict()]}
+        
+        # Save to file
+        save_venues_data(VENUES_DATA)
         
     return {"status": "success", "message": f"Venue {venue.name} added successfully"}
 
+# ============================================
+# BULK VENUE IMPORT / EXPORT
+# ============================================
+
+VENUE_FIELDS = list(Venue.model_fields.keys())
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_ROWS = 500
+
+def resolve_bulk_format(format: Optional[str], content_type: str = "") -> str:
+    """Pick 'csv' or 'ndjson' from an explicit format or the Content-Type header"""
+    fmt = (format or "").lower().strip()
+    if not fmt:
+        fmt = "csv" if "csv" in (content_type or "").lower() else "ndjson"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Use 'csv' or 'ndjson'")
+    return fmt
+
+async def iter_body_lines(request: Request):
+    """Yield decoded lines from the request body as chunks arrive (never buffers the whole upload)"""
+    pending = b""
+    line_number = 0
+
+    def decode(raw: bytes) -> str:
+        try:
+            return raw.decode("utf-8-sig").rstrip("\r")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail=f"Line {line_number} is not valid UTF-8")
+
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield decode(line)
+    if pending:
+        line_number += 1
+        yield decode(pending)
+
+async def iter_import_rows(request: Request, fmt: str):
+    """
+    Yield (row_number, row_dict, error) tuples parsed from an NDJSON or CSV upload.
+    CSV records may span several lines when a quoted field contains a newline.
+    """
+    header = None
+    record = ""
+    row_number = 0
+
+    async for line in iter_body_lines(request):
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, row, None
+            continue
+
+        # CSV: keep collecting lines until the quotes are balanced
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells mean "not provided" so optional fields fall back to their defaults
+        yield row_number, {k: v for k, v in zip(header, values) if v != ""}, None
+
+    if record:
+        row_number += 1
+        yield row_number, None, "Unterminated quoted field"
+
+def validate_venue_batch(batch: List[tuple], errors: List[dict]) -> List[tuple]:
+    """Validate a batch of parsed rows against the Venue model, collecting per-row errors"""
+    valid = []
+    for row_number, row in batch:
+        try:
+            valid.append((row_number, Venue(**row)))
+        except ValidationError as e:
+            details = "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            errors.append({"row": row_number, "name": row.get("name"), "error": details})
+    return valid
+
+def apply_venue_import(validated: List[tuple], errors: List[dict]) -> List[dict]:
+    """
+    Dedupe validated rows against the live catalog and within the upload using a name index,
+    then save and swap the catalog in one step. Returns the accepted venues.
+    """
+    global VENUES_DATA
+
+    with VENUES_LOCK:
+        name_index = {v["name"].lower() for v in VENUES_DATA["venues"]}
+        accepted = []
+        for row_number, venue in validated:
+            key = venue.name.lower()
+            if key in name_index:
+                errors.append({"row": row_number, "name": venue.name, "error": "Venue with this name already exists"})
+                continue
+            name_index.add(key)
+            accepted.append(venue.dict())
+
+        if accepted:
+            new_data = {**VENUES_DATA, "venues": VENUES_DATA["venues"] + accepted}
+            # Only swap the in-memory catalog once the new one is safely on disk
+            if not save_venues_data(new_data):
+                raise HTTPException(status_code=500, detail="Failed to save venue catalog, nothing was imported")
+            VENUES_DATA = new_data
+
+    return accepted
+
+@app.post("/admin/venues/import")
+async def import_venues(request: Request, format: Optional[str] = None):
+    """
+    Bulk import venues from an NDJSON or CSV request body.
+    Valid rows are applied as a single catalog update; invalid or duplicate rows are reported per row.
+    """
+    fmt = resolve_bulk_format(format, request.headers.get("content-type", ""))
+    errors = []
+    validated = []
+    batch = []
+    total_rows = 0
+
+    async for row_number, row, error in iter_import_rows(request, fmt):
+        total_rows += 1
+        if error:
+            errors.append({"row": row_number, "name": None, "error": error})
+            continue
+        batch.append((row_number, row))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            # Validation is CPU-bound; keep it off the event loop (and the SSE streams on it)
+            validated.extend(await run_in_threadpool(validate_venue_batch, batch, errors))
+            batch = []
+    if batch:
+        validated.extend(await run_in_threadpool(validate_venue_batch, batch, errors))
+
+    accepted = await run_in_threadpool(apply_venue_import, validated, errors)
+
+    errors.sort(key=lambda e: e["row"])
+    print(f"📦 Admin: Imported {len(accepted)}/{total_rows} venues ({len(errors)} rejected)")
+
+    return {
+        "status": "success" if not errors else "partial",
+        "format": fmt,
+        "total_rows": total_rows,
+        "imported": len(accepted),
+        "rejected": len(errors),
+        "errors": errors
+    }
+
+@app.get("/admin/venues/export")
+def export_venues(format: Optional[str] = "ndjson"):
+    """Stream the venue catalog as NDJSON or CSV"""
+    fmt = resolve_bulk_format(format)
+    venues = list(VENUES_DATA.get("venues", []))
+
+    def generate():
+        # Flush every EXPORT_CHUNK_ROWS rows - one chunk per row makes the response overhead dominate
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(VENUE_FIELDS)
+        for i, v in enumerate(venues, 1):
+            if fmt == "ndjson":
+                buffer.write(json.dumps({k: v.get(k) for k in VENUE_FIELDS}, ensure_ascii=False) + "\n")
+            else:
+                writer.writerow(["" if v.get(k) is None else v.get(k) for k in VENUE_FIELDS])
+            if i % EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        # Remaining rows (or just the header when the catalog is empty)
+        if buffer.getvalue():
+            yield buffer.getvalue()
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=venues.{fmt}"}
+    )
+
 @app.delete("/admin/venues/{venue_name}")
 def delete_venue(venue_name: str):
     """Remove a venue from the database"""
     global VENUES_DATA
     
-    original_count = len(VENUES_DATA["venues"])
-    VENUES_DATA["venues"] = [v for v in VENUES_DATA["venues"] if v["name"].lower() != venue_name.lower()]
-    
-    if len(VENUES_DATA["venues"]) == original_count:
-        raise HTTPException(status_code=404, detail=f"Venue '{venue_name}' not found")
-    
-    # Save to file
-    try:
-        with open(VENUES_PATH, "w", encoding="utf-8") as f:
-            json.dump(VENUES_DATA, f, indent=4)
-    except Exception as e:
-        print(f"Error saving venues: {e}")
+    with VENUES_LOCK:
+        remaining = [v for v in VENUES_DATA["venues"] if v["name"].lower() != venue_name.lower()]
+        
+        if len(remaining) == len(VENUES_DATA["venues"]):
+            raise HTTPException(status_code=404, detail=f"Venue '{venue_name}' not found")
+        
+        VENUES_DATA = {**VENUES_DATA, "venues": remaining}
+        
+        # Save to file
+        save_venues_data(VENUES_DATA)
         
     return {"status": "success", "message": f"Venue {venue_name} removed successfully"}
 
@@ -722,13 +1627,24 @@ def delete_venue(venue_name: str):
 def update_admin_settings(settings: dict):
     """Update system-wide settings from dashboard"""
     global SYSTEM_TIME_OVERRIDE
+
+    # Validate everything up front so a bad value leaves all settings untouched
+    admission_settings = validate_admission_settings(settings)
     
     if "system_time_override" in settings:
         val = settings["system_time_override"]
         SYSTEM_TIME_OVERRIDE = val if val != "Auto" else None
         print(f"⚙️ Admin: System time set to {SYSTEM_TIME_OVERRIDE}")
+
+    update_admission_settings(admission_settings)
+    DASHBOARD_METRICS.publish()
+
+    # Echo what was actually stored, not the raw payload
+    applied = {key: ADMISSION_SETTINGS[key] for key in admission_settings}
+    if "system_time_override" in settings:
+        applied["system_time_override"] = SYSTEM_TIME_OVERRIDE
         
-    return {"status": "success", "settings": settings}
+    return {"status": "success", "settings": applied}
 
 if __name__ == "__main__":
     import uvicorn
@@ -88,6 +88,30 @@ document.addEventListener('DOMContentLoaded', () => {
         if (!window.API) return;
 
         const data = await window.API.getMetrics();
+        renderMetrics(data);
+    }
+
+    function subscribeAdminMetrics() {
+        if (!window.API) return;
+
+        // Live updates pushed by the server (a snapshot arrives on connect);
+        // fall back to a one-off load if SSE is unavailable or never delivers anything
+        let received = false;
+        let fallbackLoaded = false;
+        const loadFallbackOnce = () => {
+            if (received || fallbackLoaded) return;
+            fallbackLoaded = true;
+            loadAdminMetrics();
+        };
+
+        const source = window.API.streamMetrics((data) => {
+            received = true;
+            renderMetrics(data);
+        }, loadFallbackOnce);
+        if (!source) loadFallbackOnce();
+    }
+
+    function renderMetrics(data) {
         if (data) {
             animateValue(metricRevenue, data.monthly_revenue_jod, ' JOD');
             animateValue(metricBookings, data.total_bookings_this_month, '');
@@ -189,7 +213,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function animateValue(element, end, suffix) {
         if (!element) return;
-        let start = 0;
+        // Animate from the value currently shown so live updates don't restart from zero
+        const start = parseFloat(element.innerText) || 0;
         const duration = 1000;
         const range = end - start;
         if (range === 0) {
@@ -287,6 +312,6 @@ document.addEventListener('DOMContentLoaded', () => {
     /* =========================================
        INIT LOGIC
        ========================================= */
-    loadAdminMetrics();
+    subscribeAdminMetrics();
     loadVenues();
 });
@@ -56,6 +56,15 @@ const API = {
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ message, timeOfDay, location, sessionId })
             });
+            if (response.status === 429) {
+                // Rate limited - answer in the chat instead of reporting a connection failure
+                const err = await response.json().catch(() => ({}));
+                return {
+                    botMessage: err.detail || "You're sending messages a bit too quickly. Please wait a moment and try again.",
+                    venues: [],
+                    filterApplied: 'rate-limited'
+                };
+            }
             if (!response.ok) throw new Error('Network response was not ok');
             return await response.json();
         } catch (error) {
@@ -123,6 +132,30 @@ const API = {
         }
     },
 
+    /**
+     * Subscribe to live Admin Metrics (Server-Sent Events)
+     * @param {Function} onUpdate - called with the metrics object on every push
+     * @param {Function} onError - optional, called whenever the connection drops or fails
+     * @returns {EventSource|null} - call .close() to stop listening
+     */
+    streamMetrics(onUpdate, onError = null) {
+        if (!window.EventSource) return null;
+        const source = new EventSource(`${API_BASE_URL}/admin/metrics/stream`);
+        source.onmessage = (event) => {
+            try {
+                onUpdate(JSON.parse(event.data));
+            } catch (error) {
+                console.error("API Error (streamMetrics):", error);
+            }
+        };
+        // EventSource reconnects on its own after network errors
+        source.onerror = () => {
+            console.warn("Metrics stream interrupted, reconnecting...");
+            if (onError) onError();
+        };
+        return source;
+    },
+
     /**
      * Update Admin Settings
      * @param {Object} settings - { system_time_override, court_3_maintenance }